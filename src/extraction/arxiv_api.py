@@ -1,143 +1,320 @@
 import requests
+import requests_cache
+from requests.adapters import HTTPAdapter
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
 from tqdm import tqdm
 from pathlib import Path
-import json
-from xml.etree import ElementTree as ET
-import time
+import gzip
+from lxml import etree
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+import threading
+
+# Espaces de noms et expressions XPath compilées une seule fois
+NS = {'a': 'http://www.w3.org/2005/Atom', 'arxiv': 'http://arxiv.org/schemas/atom'}
+ENTRY_TAG = '{http://www.w3.org/2005/Atom}entry'
+
+
+def _xpath(expr):
+    return etree.XPath(expr, namespaces=NS, smart_strings=False)
+
+
+_X_ID = _xpath('a:id/text()')
+_X_PUBLISHED = _xpath('a:published/text()')
+_X_UPDATED = _xpath('a:updated/text()')
+_X_TITLE = _xpath('a:title/text()')
+_X_SUMMARY = _xpath('a:summary/text()')
+_X_AUTHORS = _xpath('a:author')
+_X_AUTHOR_NAME = _xpath('a:name/text()')
+_X_AUTHOR_AFFILIATION = _xpath('a:affiliation/text()')
+_X_PRIMARY_CATEGORY = _xpath('arxiv:primary_category/@term')
+_X_CATEGORIES = _xpath('a:category/@term')
+_X_PDF_URL = _xpath('a:link[@title="pdf"]/@href')
+_X_DOI = _xpath('arxiv:doi/text()')
+_X_COMMENT = _xpath('arxiv:comment/text()')
+_X_JOURNAL_REF = _xpath('arxiv:journal_ref/text()')
+
+
+# Schéma fixe des fichiers de sortie (une ligne par article)
+ARTICLE_SCHEMA = pa.schema([
+    ('arxiv_id', pa.string()),
+    ('domain', pa.string()),
+    ('title', pa.string()),
+    ('abstract', pa.string()),
+    ('published', pa.string()),
+    ('updated', pa.string()),
+    ('authors', pa.string()),
+    ('primary_category', pa.string()),
+    ('categories', pa.string()),
+    ('pdf_url', pa.string()),
+    ('doi', pa.string()),
+    ('comment', pa.string()),
+    ('journal_ref', pa.string()),
+])
+
+
+def _first(values, default=None):
+    """Retourne le premier résultat d'une requête XPath"""
+    return values[0] if values else default
+
 
 class ArXivExtractor:
     def __init__(self):
         self.base_url = "http://export.arxiv.org/api/query"
         self.max_batch_size = 1000  # Nombre max d'articles par requête
         self.delay = 3  # Délai entre les requêtes (en secondes)
+        self.max_workers = 4  # Requêtes simultanées au maximum
+
+        # Session partagée avec cache disque : réutilise les connexions TCP entre les lots
+        # et évite de réinterroger l'API pour une requête déjà faite (revalidation ETag/Last-Modified)
+        cache_dir = Path('../../data/cache')
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        self.session = requests_cache.CachedSession(
+            str(cache_dir / 'arxiv'),
+            backend='sqlite',
+            expire_after=7 * 24 * 3600,
+        )
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=8)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
 
     def get_all_metadata(self, search_query, max_results=30000):
-        """Récupère les métadonnées avec pagination automatique"""
-        all_articles = []
-        total_retrieved = 0
-
-        with tqdm(total=max_results, desc=f"Recherche: {search_query[:30]}") as pbar:
-            while total_retrieved < max_results:
-                batch_size = min(self.max_batch_size, max_results - total_retrieved)
-
-                params = {
-                    'search_query': search_query,
-                    'start': total_retrieved,
-                    'max_results': batch_size,
-                    'sortBy': 'submittedDate',
-                    'sortOrder': 'descending'
-                }
-
-                try:
-                    response = requests.get(self.base_url, params=params, timeout=30)
-                    response.raise_for_status()
-                    articles = self._parse_full_xml(response.text, search_query)
+        """Génère les métadonnées lot par lot (une page de l'API par lot) avec pagination automatique"""
+        # Tous les lots sont connus d'avance : (start, taille)
+        offsets = [(start, min(self.max_batch_size, max_results - start))
+                   for start in range(0, max_results, self.max_batch_size)]
+
+        # Un seul départ de requête par délai, mais plusieurs réponses en attente en parallèle.
+        # Le jeton est pris dans le fil principal avant la soumission : les pages partent dans l'ordre
+        throttle = threading.Semaphore(1)
+
+        with tqdm(total=max_results, desc=f"Recherche: {search_query[:30]}") as pbar, \
+                ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            # Fenêtre glissante : au plus max_workers pages en vol, chaque page est
+            # oubliée dès qu'elle a été transmise, la mémoire reste bornée à la fenêtre
+            remaining = iter(offsets)
+            pending = deque()
+
+            def submit_next():
+                offset = next(remaining, None)
+                if offset is None:
+                    return False
+                start, batch_size = offset
+                params = self._query_params(search_query, start, batch_size)
+
+                # Les réponses en cache et non expirées ne touchent pas l'API : pas de délai à respecter
+                if not self._is_fresh(params):
+                    throttle.acquire()
+                    # Le jeton est rendu après le délai, quelle que soit la durée de la requête
+                    timer = threading.Timer(self.delay, throttle.release)
+                    timer.daemon = True
+                    timer.start()
+
+                pending.append((batch_size, executor.submit(self._fetch_batch, params, search_query)))
+                return True
+
+            submit_next()
+
+            try:
+                while pending:
+                    # Pages suivantes demandées tant que la page attendue n'est pas arrivée ;
+                    # une page courte arrête la pagination sans requêtes au-delà de la fin
+                    while (len(pending) < self.max_workers and not pending[0][1].done()
+                           and submit_next()):
+                        pass
+
+                    batch_size, future = pending.popleft()
+                    try:
+                        articles = future.result()[:batch_size]
+                    except Exception as e:
+                        print(f"\nErreur lors de la récupération: {str(e)}")
+                        break
 
                     if not articles:
                         break  # Plus d'articles disponibles
 
-                    all_articles.extend(articles)
-                    total_retrieved += len(articles)
                     pbar.update(len(articles))
+                    yield articles
 
-                    time.sleep(self.delay)  # Respect du délai
-
-                except Exception as e:
-                    print(f"\nErreur lors de la récupération: {str(e)}")
-                    break
-
-        return all_articles[:max_results]
-
-    def _parse_full_xml(self, xml_text, search_query):
-        """Analyse le XML et extrait les métadonnées"""
-        articles = []
-        root = ET.fromstring(xml_text)
-
-        for entry in root.findall('{http://www.w3.org/2005/Atom}entry'):
-            article = {
-                'arxiv_id': entry.find('{http://www.w3.org/2005/Atom}id').text.split('/')[-1],
-                'published': entry.find('{http://www.w3.org/2005/Atom}published').text,
-                'updated': entry.find('{http://www.w3.org/2005/Atom}updated').text,
-                'title': self._clean_text(entry.find('{http://www.w3.org/2005/Atom}title').text),
-                'summary': self._clean_text(entry.find('{http://www.w3.org/2005/Atom}summary').text),
-                'authors': [self._parse_author(author) for author in
-                            entry.findall('{http://www.w3.org/2005/Atom}author')],
-                'primary_category': entry.find('{http://arxiv.org/schemas/atom}primary_category').attrib['term'],
-                'categories': [cat.attrib['term'] for cat in entry.findall('{http://www.w3.org/2005/Atom}category')],
-                'pdf_url': self._find_pdf_link(entry),
-                'doi': self._find_doi(entry),
-                'comment': entry.find('{http://arxiv.org/schemas/atom}comment').text if entry.find(
-                    '{http://arxiv.org/schemas/atom}comment') is not None else None,
-                'journal_ref': entry.find('{http://arxiv.org/schemas/atom}journal_ref').text if entry.find(
-                    '{http://arxiv.org/schemas/atom}journal_ref') is not None else None,
-                'search_query': search_query  # Ajoute la requête originale
-            }
-            articles.append(article)
-
-        return articles
+                    if len(articles) < batch_size:
+                        break  # Dernier lot partiel
 
-    def _parse_author(self, author_element):
-        """Extrait les informations d'un auteur"""
+                    if not pending:
+                        submit_next()
+            finally:
+                for _, future in pending:
+                    future.cancel()
+
+    def _query_params(self, search_query, start, batch_size):
+        """Paramètres de la requête API pour une page"""
         return {
-            'name': author_element.find('{http://www.w3.org/2005/Atom}name').text,
-            'affiliation': author_element.find('{http://www.w3.org/2005/Atom}affiliation').text
-            if author_element.find('{http://www.w3.org/2005/Atom}affiliation') is not None else None
+            'search_query': search_query,
+            'start': start,
+            'max_results': batch_size,
+            'sortBy': 'submittedDate',
+            'sortOrder': 'descending'
         }
 
-    def _find_pdf_link(self, entry):
-        """Trouve le lien vers le PDF"""
-        for link in entry.findall('{http://www.w3.org/2005/Atom}link'):
-            if 'title' in link.attrib and link.attrib['title'] == 'pdf':
-                return link.attrib['href']
-        return None
+    def _fetch_batch(self, params, search_query):
+        """Récupère un lot d'articles (le délai entre requêtes est géré par l'appelant)"""
+        # Analyse au fil du téléchargement plutôt qu'après réception du corps complet
+        with self.session.get(self.base_url, params=params, stream=True, timeout=30) as response:
+            response.raise_for_status()
+            return list(self._parse_stream(response.iter_content(8192), search_query))
+
+    def _is_fresh(self, params):
+        """Indique si la réponse à ces paramètres est en cache et pas encore expirée"""
+        request = self.session.prepare_request(requests.Request('GET', self.base_url, params=params))
+        cached = self.session.cache.get_response(self.session.cache.create_key(request))
+        return cached is not None and not cached.is_expired
+
+    def _parse_stream(self, chunks, search_query):
+        """Analyse le XML morceau par morceau et génère les métadonnées entrée par entrée"""
+        parser = etree.XMLPullParser(events=('end',), tag=ENTRY_TAG)
+
+        for chunk in chunks:
+            parser.feed(chunk)
+            for _, entry in parser.read_events():
+                yield self._parse_entry(entry, search_query)
+
+                # Libère l'entrée traitée pour garder une mémoire constante
+                entry.clear()
+                while entry.getprevious() is not None:
+                    del entry.getparent()[0]
+
+        parser.close()
+
+    def _parse_entry(self, entry, search_query):
+        """Extrait les métadonnées d'une entrée Atom"""
+        return {
+            'arxiv_id': _first(_X_ID(entry), '').split('/')[-1],
+            'published': _first(_X_PUBLISHED(entry)),
+            'updated': _first(_X_UPDATED(entry)),
+            'title': self._clean_text(_first(_X_TITLE(entry))),
+            'summary': self._clean_text(_first(_X_SUMMARY(entry))),
+            'authors': [self._parse_author(author) for author in _X_AUTHORS(entry)],
+            'primary_category': _first(_X_PRIMARY_CATEGORY(entry)),
+            'categories': _X_CATEGORIES(entry),
+            'pdf_url': _first(_X_PDF_URL(entry)),
+            'doi': _first(_X_DOI(entry)),
+            'comment': _first(_X_COMMENT(entry)),
+            'journal_ref': _first(_X_JOURNAL_REF(entry)),
+            'search_query': search_query  # Ajoute la requête originale
+        }
 
-    def _find_doi(self, entry):
-        """Trouve le DOI si disponible"""
-        for id_element in entry.findall('{http://arxiv.org/schemas/atom}doi'):
-            return id_element.text
-        return None
+    def _parse_author(self, author_element):
+        """Extrait les informations d'un auteur"""
+        return {
+            'name': _first(_X_AUTHOR_NAME(author_element)),
+            'affiliation': _first(_X_AUTHOR_AFFILIATION(author_element))
+        }
 
     def _clean_text(self, text):
         """Nettoie le texte des caractères indésirables"""
         return text.replace('\n', ' ').strip() if text else ""
 
-    def save_combined_data(self, all_articles, filename):
-        """Sauvegarde tous les résultats dans un seul fichier"""
+    def write_stream(self, batches, filename):
+        """Écrit les lots d'articles dans un fichier Parquet au fur et à mesure de leur arrivée.
+
+        Un seul lot est gardé en mémoire à la fois ; retourne le chemin du fichier,
+        ou None si aucun lot n'a été reçu.
+        """
         output_dir = Path('../../data/raw')
         output_dir.mkdir(parents=True, exist_ok=True)
+        parquet_path = output_dir / f'{filename}.parquet'
+
+        writer = None
+        try:
+            for batch in batches:
+                if writer is None:
+                    writer = pq.ParquetWriter(parquet_path, ARTICLE_SCHEMA, compression='snappy')
+                writer.write_table(pa.Table.from_pydict(self._to_columns(batch), schema=ARTICLE_SCHEMA))
+        finally:
+            if writer is not None:
+                writer.close()
+
+        if writer is None:
+            return None
+
+        print(f"Fichier Parquet sauvegardé : {parquet_path}")
+        return parquet_path
+
+    def _to_columns(self, articles):
+        """Construit les colonnes du fichier de sortie en une seule passe sur les articles"""
+        n = len(articles)
+        arxiv_id, domain, title, abstract = [None] * n, [None] * n, [None] * n, [None] * n
+        published, updated, primary_category, categories = [None] * n, [None] * n, [None] * n, [None] * n
+        pdf_url, doi, comment, journal_ref = [None] * n, [None] * n, [None] * n, [None] * n
+
+        for i, a in enumerate(articles):
+            arxiv_id[i] = a['arxiv_id']
+            domain[i] = a['search_query']
+            title[i] = a['title']
+            abstract[i] = a['summary']
+            published[i] = a['published']
+            updated[i] = a['updated']
+            primary_category[i] = a['primary_category']
+            categories[i] = '|'.join(a['categories'])
+            pdf_url[i] = a['pdf_url']
+            doi[i] = a['doi']
+            comment[i] = a['comment']
+            journal_ref[i] = a['journal_ref']
+
+        authors = ['; '.join(f"{x['name']} ({x['affiliation']})" if x['affiliation'] else x['name']
+                             for x in a['authors'])
+                   for a in articles]
+
+        return {
+            'arxiv_id': arxiv_id,
+            'domain': domain,
+            'title': title,
+            'abstract': abstract,
+            'published': published,
+            'updated': updated,
+            'authors': authors,
+            'primary_category': primary_category,
+            'categories': categories,
+            'pdf_url': pdf_url,
+            'doi': doi,
+            'comment': comment,
+            'journal_ref': journal_ref
+        }
 
-        # Sauvegarde JSON
-        """ json_path = output_dir / f'{filename}.json'
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(all_articles, f, indent=2, ensure_ascii=False)
-        print(f"\nFichier JSON sauvegardé : {json_path}")"""
-
-        # Conversion pour CSV
-        csv_data = []
-        for article in all_articles:
-            csv_data.append({
-                'arxiv_id': article['arxiv_id'],
-                'domain': article['search_query'],
-                'title': article['title'],
-                'abstract': article['summary'],
-                'published': article['published'],
-                'updated': article['updated'],
-                'authors': '; '.join([f"{a['name']}" + (f" ({a['affiliation']})" if a['affiliation'] else "")
-                                      for a in article['authors']]),
-                'primary_category': article['primary_category'],
-                'categories': '|'.join(article['categories']),
-                'pdf_url': article['pdf_url'],
-                'doi': article['doi'],
-                'comment': article['comment'],
-                'journal_ref': article['journal_ref']
-            })
-
-        # Sauvegarde CSV
-        csv_path = output_dir / f'{filename}.csv'
-        pd.DataFrame(csv_data).to_csv(csv_path, index=False, encoding='utf-8')
+    def export_csv(self, parquet_path, compression=None):
+        """Exporte un fichier Parquet en CSV (éventuellement gzip), groupe de lignes par groupe de lignes"""
+        parquet_file = pq.ParquetFile(parquet_path)
+
+        if compression == 'gzip':
+            # Niveau 1 : le niveau 9 par défaut de gzip domine le temps d'écriture
+            csv_path = Path(parquet_path).with_suffix('.csv.gz')
+            sink = gzip.open(csv_path, 'wb', compresslevel=1)
+        else:
+            csv_path = Path(parquet_path).with_suffix('.csv')
+            sink = open(csv_path, 'wb')
+
+        # Formatage des lignes en C par pyarrow plutôt que par DataFrame.to_csv
+        with sink, pacsv.CSVWriter(sink, parquet_file.schema_arrow,
+                                   write_options=pacsv.WriteOptions(include_header=True)) as writer:
+            for batch in parquet_file.iter_batches():
+                writer.write_batch(batch)
         print(f"Fichier CSV sauvegardé : {csv_path}")
 
+        return csv_path
+
+    def save_feather(self, df, filename):
+        """Sauvegarde un DataFrame en Feather (Arrow IPC compressé), format d'échange avec le nettoyage"""
+        output_dir = Path('../../data/raw')
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        feather_path = output_dir / f'{filename}.feather'
+        df.to_feather(feather_path, compression='zstd', compression_level=3)
+        print(f"Fichier Feather sauvegardé : {feather_path}")
+
+        return feather_path
+
 
 def main():
     print("\n=== Extracteur arXiv Multi-Domaines ===")
@@ -148,48 +325,65 @@ def main():
     filename = filename or "arxiv_combined"
 
     extractor = ArXivExtractor()
-    all_results = []
-
-    while True:
-        # Saisie du domaine
-        query = input("\nEntrez un domaine à rechercher (ex: 'machine learning'): ").strip()
-        while not query:
-            query = input("Veuillez entrer un domaine valide: ").strip()
-
-        # Nombre d'articles
-        max_results = input("Nombre d'articles à récupérer [100 par défaut]: ").strip()
-        try:
-            max_results = min(30000, int(max_results)) if max_results else 100
-        except ValueError:
-            print("Nombre invalide. Utilisation de 100 par défaut.")
-            max_results = 100
-
-        # Récupération des articles
-        articles = extractor.get_all_metadata(f"all:{query}", max_results)
-
-        if articles:
-            all_results.extend(articles)
-            print(f"→ {len(articles)} articles ajoutés (Total: {len(all_results)})")
-        else:
-            print("Aucun article trouvé pour ce domaine.")
-
-        # Demande de continuation
-        continuer = input("\nVoulez-vous rechercher un autre domaine ? (oui/non): ").strip().lower()
-        while continuer not in ['oui', 'non', 'o', 'n']:
-            continuer = input("Répondez 'oui' ou 'non': ").strip().lower()
-
-        if continuer in ['non', 'n']:
-            break
+    total_articles = 0
+    domains = set()
+
+    def interactive_batches():
+        """Demande les domaines un par un et génère les lots au fil de la récupération"""
+        nonlocal total_articles
+
+        while True:
+            # Saisie du domaine
+            query = input("\nEntrez un domaine à rechercher (ex: 'machine learning'): ").strip()
+            while not query:
+                query = input("Veuillez entrer un domaine valide: ").strip()
+
+            # Nombre d'articles
+            max_results = input("Nombre d'articles à récupérer [100 par défaut]: ").strip()
+            try:
+                max_results = min(30000, int(max_results)) if max_results else 100
+            except ValueError:
+                print("Nombre invalide. Utilisation de 100 par défaut.")
+                max_results = 100
+
+            # Récupération des articles, écrits lot par lot
+            retrieved = 0
+            for batch in extractor.get_all_metadata(f"all:{query}", max_results):
+                retrieved += len(batch)
+                yield batch
+
+            if retrieved:
+                total_articles += retrieved
+                domains.add(query)
+                print(f"→ {retrieved} articles ajoutés (Total: {total_articles})")
+            else:
+                print("Aucun article trouvé pour ce domaine.")
+
+            # Demande de continuation
+            continuer = input("\nVoulez-vous rechercher un autre domaine ? (oui/non): ").strip().lower()
+            while continuer not in ['oui', 'non', 'o', 'n']:
+                continuer = input("Répondez 'oui' ou 'non': ").strip().lower()
+
+            if continuer in ['non', 'n']:
+                break
+
+    parquet_path = extractor.write_stream(interactive_batches(), filename)
+
+    # Résumé final
+    if parquet_path is not None:
+        # Feather pour le nettoyage, CSV uniquement pour une lecture humaine
+        export = input("\nExport supplémentaire ? (feather/csv/non): ").strip().lower()
+        if export == 'feather':
+            extractor.save_feather(pd.read_parquet(parquet_path), filename)
+        elif export == 'csv':
+            extractor.export_csv(parquet_path)
 
-    # Sauvegarde finale
-    if all_results:
-        extractor.save_combined_data(all_results, filename)
         print("\nRésumé final:")
-        print(f"- Articles totaux: {len(all_results)}")
-        print(f"- Domaines différents: {len(set(a['search_query'] for a in all_results))}")
+        print(f"- Articles totaux: {total_articles}")
+        print(f"- Domaines différents: {len(domains)}")
     else:
         print("\nAucune donnée à sauvegarder.")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,9 +1,43 @@
 import pandas as pd
+import numpy as np
 import json
+import orjson
 from pathlib import Path
 import re
 import sys
-from datetime import datetime
+import os
+from multiprocessing import Pool
+
+# Copy-on-Write (pandas >= 2.0, toujours actif à partir de 3.0) : les étapes de nettoyage
+# réassignent des colonnes sans copie défensive du DataFrame complet
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.options.mode.copy_on_write = True
+
+# Expressions de nettoyage compilées une seule fois, partagées par toutes les instances
+_RE_WS = re.compile(r'\s+')
+_RE_BAD = re.compile(r'[^\w\s.,;:!?\'"-]')
+_ISO_DATE_PATTERN = r'\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}Z'
+
+# Types imposés au chargement : catégories pour les colonnes peu variées, chaînes Arrow pour le texte
+DTYPES = {
+    'primary_category': 'category',
+    'domain': 'category',
+    'doi': 'string[pyarrow]',
+    'journal_ref': 'string[pyarrow]',
+    'title': 'string[pyarrow]',
+    'abstract': 'string[pyarrow]',
+}
+
+# Au-delà de ce nombre de lignes, le nettoyage pandas est réparti sur plusieurs processus
+POOL_MIN_ROWS = 200_000
+
+
+def clean_text_series(s: pd.Series) -> pd.Series:
+    """Nettoyage vectorisé d'une série de textes (fonction de module, utilisable par un Pool)"""
+    return (s.str.replace(_RE_BAD, '', regex=True)
+             .str.replace(_RE_WS, ' ', regex=True)
+             .str.strip())
+
 
 class DataCleaner:
     def __init__(self):
@@ -12,10 +46,10 @@ class DataCleaner:
         self.processed_dir.mkdir(exist_ok=True)
 
     def get_user_input(self) -> tuple:
-        available_files = [f.name for f in self.raw_dir.glob("*") if f.suffix in ('.csv', '.json')]
+        available_files = [f.name for f in self.raw_dir.glob("*") if f.suffix in ('.csv', '.json', '.parquet', '.feather')]
 
         if not available_files:
-            print("Aucun fichier CSV ou JSON trouvé dans data/raw/")
+            print("Aucun fichier CSV, JSON, Parquet ou Feather trouvé dans data/raw/")
             sys.exit(1)
 
         print("\nFichiers disponibles dans data/raw/:")
@@ -44,17 +78,20 @@ class DataCleaner:
         file_path = self.raw_dir / input_file
 
         if file_path.suffix == '.csv':
-            return pd.read_csv(file_path)
+            return pd.read_csv(file_path, dtype=DTYPES, dtype_backend='pyarrow')
         elif file_path.suffix == '.json':
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            return pd.DataFrame(data)
+            data = orjson.loads(file_path.read_bytes())
+            df = pd.DataFrame(data).convert_dtypes(dtype_backend='pyarrow')
+        elif file_path.suffix == '.parquet':
+            df = pd.read_parquet(file_path)
+        elif file_path.suffix == '.feather':
+            df = pd.read_feather(file_path)
         else:
-            raise ValueError("Format de fichier non supporté. Utilisez .csv ou .json")
+            raise ValueError("Format de fichier non supporté. Utilisez .csv, .json, .parquet ou .feather")
 
-    def clean_data(self, df: pd.DataFrame) -> pd.DataFrame:
-        df = df.copy()
+        return df.astype({col: dtype for col, dtype in DTYPES.items() if col in df.columns})
 
+    def clean_data(self, df: pd.DataFrame) -> pd.DataFrame:
         df = self._remove_duplicates(df)
         df = self._clean_text_fields(df)
         df = self._normalize_domains(df)
@@ -67,51 +104,61 @@ class DataCleaner:
 
     def _remove_duplicates(self, df: pd.DataFrame) -> pd.DataFrame:
         if 'arxiv_id' in df.columns:
-            df = df.drop_duplicates(subset=['arxiv_id'], keep='first').copy()
+            df = df.drop_duplicates(subset=['arxiv_id'], keep='first')
         else:
-            df = df.drop_duplicates().copy()
+            df = df.drop_duplicates()
 
-        # Supprimer les lignes où arxiv_id, domain, title ou authors sont vides ou NaN
-        required_fields = ['arxiv_id', 'domain', 'title', 'authors']
+        # Supprimer les lignes où arxiv_id, domain, title ou authors sont vides ou NaN,
+        # en un seul masque combiné puis une seule sélection
+        required_fields = [c for c in ['arxiv_id', 'domain', 'title', 'authors'] if c in df.columns]
+        mask = np.ones(len(df), dtype=bool)
         for field in required_fields:
-            if field in df.columns:
-                df = df[df[field].notna() & (df[field].astype(str).str.strip() != '')]
+            lengths = df[field].astype('string').str.strip().str.len().fillna(0)
+            mask &= lengths.to_numpy() > 0
 
-        return df
+        return df.loc[mask]
 
     def _clean_text_fields(self, df: pd.DataFrame) -> pd.DataFrame:
         text_cols = ['title', 'abstract', 'authors', 'comment', 'journal_ref']
 
-        for col in text_cols:
-            if col in df.columns:
-                df.loc[:, col] = df[col].astype(str).apply(self._clean_text)
+        workers = os.cpu_count() or 1
+        pool = Pool(workers) if workers > 1 and len(df) >= POOL_MIN_ROWS else None
+
+        try:
+            for col in text_cols:
+                if col in df.columns:
+                    s = df[col].astype('string')
+                    if pool is not None:
+                        # Un bloc de lignes par processus, recollés dans l'ordre d'origine
+                        bounds = np.linspace(0, len(s), workers + 1, dtype=int)
+                        chunks = [s.iloc[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+                        df[col] = pd.concat(pool.map(clean_text_series, chunks))
+                    else:
+                        df[col] = clean_text_series(s)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
 
         return df
 
-    def _clean_text(self, text: str) -> str:
-        if not isinstance(text, str):
-            return ""
-        text = re.sub(r'\s+', ' ', text)
-        text = re.sub(r'[^\w\s.,;:!?\'"-]', '', text)
-        return text.strip()
-
     def _normalize_domains(self, df: pd.DataFrame) -> pd.DataFrame:
         if 'domain' in df.columns:
-            df.loc[:, 'domain'] = df['domain'].str.replace('all:', '', regex=False).str.title()
+            df['domain'] = df['domain'].str.replace('all:', '', regex=False).str.title()
         return df
 
     def _handle_missing_values(self, df: pd.DataFrame) -> pd.DataFrame:
         if 'abstract' in df.columns:
-            df.loc[:, 'abstract'] = df['abstract'].fillna('No abstract available')
+            df['abstract'] = df['abstract'].fillna('No abstract available')
 
         if 'doi' in df.columns:
-            df.loc[:, 'doi'] = df['doi'].fillna('AUCUN')
+            df['doi'] = df['doi'].fillna('AUCUN')
 
         if 'comment' in df.columns:
-            df.loc[:, 'comment'] = df['comment'].replace(['None', 'nan'], 'AUCUN').fillna('AUCUN')
+            df['comment'] = df['comment'].replace(['None', 'nan'], 'AUCUN').fillna('AUCUN')
 
         if 'journal_ref' in df.columns:
-            df.loc[:, 'journal_ref'] = df['journal_ref'].replace(['None', 'nan'], 'AUCUNE').fillna('AUCUNE')
+            df['journal_ref'] = df['journal_ref'].replace(['None', 'nan'], 'AUCUNE').fillna('AUCUNE')
 
         return df
 
@@ -122,61 +169,50 @@ class DataCleaner:
                     return x
                 if isinstance(x, str):
                     try:
-                        return json.loads(x)
-                    except json.JSONDecodeError:
+                        return orjson.loads(x)
+                    except orjson.JSONDecodeError:
                         authors_list = [a.strip() for a in x.split(';') if a.strip()]
                         return [{'name': name, 'affiliation': None} for name in authors_list]
                 return []
 
-            df.loc[:, 'authors_parsed'] = df['authors'].apply(parse_authors)
+            df['authors_parsed'] = df['authors'].map(parse_authors)
 
-            df.loc[:, 'author_count'] = df['authors_parsed'].apply(len)
+            s = df['authors_parsed']
+            df['author_count'] = s.str.len().fillna(0).astype('int32')
 
-            df.loc[:, 'first_author'] = df['authors_parsed'].apply(
-                lambda x: x[0]['name'] if len(x) > 0 else 'Unknown'
-            )
-            df.loc[:, 'last_author'] = df['authors_parsed'].apply(
-                lambda x: x[-1]['name'] if len(x) > 0 else 'Unknown'
-            )
+            # Premier / dernier auteur via explode + groupby plutôt que deux apply
+            names = s.explode().str['name']
+            grp = names.groupby(level=0)
+            df['first_author'] = grp.first().reindex(df.index).fillna('Unknown')
+            df['last_author'] = grp.last().reindex(df.index).fillna('Unknown')
 
         return df
 
     def _process_categories(self, df: pd.DataFrame) -> pd.DataFrame:
         if 'categories' in df.columns:
-            def fix_cats(cat):
-                if not isinstance(cat, str):
-                    return ""
-
-                # Cas 1: Déjà séparé par des pipes (|)
-                if '|' in cat:
-                    return '; '.join([c.strip() for c in cat.split('|') if c.strip()])
-
-                # Cas 2: Déjà séparé par des points-virgules (mais mal formaté)
-                if ';' in cat:
-                    return '; '.join([c.strip() for c in cat.split(';') if c.strip()])
-
-                # Cas 3: Autres formats (garder tel quel)
-                return cat.strip()
-
-            df.loc[:, 'categories'] = df['categories'].apply(fix_cats)
+            # Pipes (|) et points-virgules mal formatés normalisés en '; ', segments vides supprimés
+            s = df['categories'].astype('string').fillna('')
+            s = s.str.replace('|', ';', regex=False)
+            s = s.str.replace(r'\s*(?:;\s*)+', '; ', regex=True).str.strip('; ')
+            df['categories'] = s
 
         return df
 
     def _process_dates(self, df: pd.DataFrame) -> pd.DataFrame:
         for date_col in ['published', 'updated']:
             if date_col in df.columns:
-                def format_date(d):
-                    if not isinstance(d, str):
-                        return ""
-                    d_split = d.split(',')  # Séparation multiple si jamais
-                    d1 = d_split[0].strip()
-                    try:
-                        dt = datetime.strptime(d1, "%Y-%m-%dT%H:%M:%SZ")
-                        return dt.strftime("%Y/%m/%d %H:%M:%S")
-                    except Exception:
-                        return d1  # Garder tel quel si erreur
-
-                df.loc[:, date_col] = df[date_col].apply(format_date)
+                # Première date si plusieurs, gardée telle quelle si elle n'est pas une date valide
+                raw = df[date_col].astype('string').str.split(',').str[0].str.strip()
+                dt = pd.to_datetime(raw, format="%Y-%m-%dT%H:%M:%SZ", errors='coerce')
+
+                # Dates valides déjà complètes (cas courant) : reformatées par découpage de chaîne,
+                # strftime seulement pour les autres (ex. '2024-1-2T3:4:5Z')
+                sliced = raw.str.fullmatch(_ISO_DATE_PATTERN).fillna(False) & dt.notna()
+                formatted = raw.str.slice(0, 19).str.replace('-', '/').str.replace('T', ' ').where(sliced)
+                others = dt.notna() & ~sliced
+                if others.any():
+                    formatted[others] = dt[others].dt.strftime("%Y/%m/%d %H:%M:%S")
+                df[date_col] = formatted.fillna(raw).fillna("")
 
         return df
 
@@ -7,6 +7,17 @@ import sys
 DB_PATH = Path("../../data/processed/db.sqlite")
 PROCESSED_DIR = Path("../../data/processed")
 
+# Import du CSV par blocs : mémoire bornée quelle que soit la taille du fichier
+CHUNK_SIZE = 50_000
+COL_DTYPES = {
+    'arxiv_id': 'string[pyarrow]',
+    'title': 'string[pyarrow]',
+    'abstract': 'string[pyarrow]',
+}
+
+# Nombre de lignes par INSERT ... VALUES (...), (...), ... (limite SQLITE_MAX_COMPOUND_SELECT)
+INSERT_BATCH = 500
+
 def list_csv_files():
     files = [f for f in PROCESSED_DIR.glob("*.csv")]
     if not files:
@@ -29,10 +40,9 @@ def choose_file(files):
             print("Veuillez entrer un nombre valide.")
 
 
-def create_tables(conn):
-    cursor = conn.cursor()
-
-    cursor.execute("""
+def create_tables(cursor):
+    # Tout le schéma en un seul script (executescript valide d'abord toute transaction en cours)
+    cursor.executescript("""
     CREATE TABLE IF NOT EXISTS articles (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         arxiv_id TEXT UNIQUE,
@@ -46,17 +56,13 @@ def create_tables(conn):
         journal_ref TEXT,
         pdf_url TEXT
     );
-    """)
 
-    cursor.execute("""
     CREATE TABLE IF NOT EXISTS authors (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         name TEXT UNIQUE,
         affiliation TEXT
     );
-    """)
 
-    cursor.execute("""
     CREATE TABLE IF NOT EXISTS article_authors (
         article_id INTEGER,
         author_id INTEGER,
@@ -65,16 +71,12 @@ def create_tables(conn):
         FOREIGN KEY (article_id) REFERENCES articles(id),
         FOREIGN KEY (author_id) REFERENCES authors(id)
     );
-    """)
 
-    cursor.execute("""
     CREATE TABLE IF NOT EXISTS categories (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         name TEXT UNIQUE
     );
-    """)
 
-    cursor.execute("""
     CREATE TABLE IF NOT EXISTS article_categories (
         article_id INTEGER,
         category_id INTEGER,
@@ -82,127 +84,194 @@ def create_tables(conn):
         FOREIGN KEY (article_id) REFERENCES articles(id),
         FOREIGN KEY (category_id) REFERENCES categories(id)
     );
+
+    -- La clé primaire (article_id, author_id) ne sert pas aux recherches par auteur
+    CREATE INDEX IF NOT EXISTS idx_aa_author ON article_authors(author_id);
     """)
 
-    conn.commit()
 
+ARTICLE_COLUMNS = ['arxiv_id', 'title', 'abstract', 'published', 'updated', 'domain',
+                   'doi', 'comment', 'journal_ref', 'pdf_url']
+
+
+def insert_articles(cursor, df):
+    """Insère tous les articles en une fois et retourne la correspondance arxiv_id -> id"""
+    rows = [
+        (
+            arxiv_id, title, abstract, published, updated, domain,
+            None if doi == 'AUCUN' else doi,
+            None if comment in ('AUCUN', 'VIDE') else comment,
+            None if journal_ref in ('AUCUNE', 'AUCUN') else journal_ref,
+            pdf_url,
+        )
+        for (arxiv_id, title, abstract, published, updated, domain,
+             doi, comment, journal_ref, pdf_url)
+        in _with_none(df.reindex(columns=ARTICLE_COLUMNS)).itertuples(index=False, name=None)
+    ]
+
+    # executemany ne peut pas utiliser RETURNING : INSERT multi-lignes par lots.
+    # Le DO UPDATE sans effet fait renvoyer l'id même pour un article déjà présent (SQLite >= 3.35)
+    article_ids = {}
+    for i in range(0, len(rows), INSERT_BATCH):
+        batch = rows[i:i + INSERT_BATCH]
+        cursor.execute("""
+        INSERT INTO articles (
+            arxiv_id, title, abstract, published, updated, domain,
+            doi, comment, journal_ref, pdf_url
+        ) VALUES """ + ",".join(["(?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"] * len(batch)) + """
+        ON CONFLICT(arxiv_id) DO UPDATE SET arxiv_id = excluded.arxiv_id
+        RETURNING arxiv_id, id
+        """, [value for row in batch for value in row])
+        article_ids.update(cursor.fetchall())
+    return article_ids
 
-def get_author_id(conn, name, affiliation=None):
-    cursor = conn.cursor()
-    cursor.execute("SELECT id FROM authors WHERE name = ?", (name,))
-    row = cursor.fetchone()
-    if row:
-        return row[0]
-    cursor.execute("INSERT INTO authors (name, affiliation) VALUES (?, ?)", (name, affiliation))
-    conn.commit()
-    return cursor.lastrowid
 
+def _with_none(df):
+    """Remplace les valeurs manquantes (NaN, pd.NA) par None, seule valeur nulle acceptée par sqlite3"""
+    return df.astype(object).where(df.notna(), None)
 
-def get_category_id(conn, name):
-    cursor = conn.cursor()
-    cursor.execute("SELECT id FROM categories WHERE name = ?", (name,))
-    row = cursor.fetchone()
-    if row:
-        return row[0]
-    cursor.execute("INSERT INTO categories (name) VALUES (?)", (name,))
-    conn.commit()
-    return cursor.lastrowid
 
+def load_id_cache(cursor, table):
+    """Charge en mémoire la correspondance nom -> id d'une table (authors ou categories)"""
+    return dict(cursor.execute(f"SELECT name, id FROM {table}").fetchall())
 
-def insert_article(conn, article):
-    cursor = conn.cursor()
-    cursor.execute("""
-    INSERT OR IGNORE INTO articles (
-        arxiv_id, title, abstract, published, updated, domain,
-        doi, comment, journal_ref, pdf_url
-    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
-        article.get('arxiv_id'),
-        article.get('title'),
-        article.get('abstract'),
-        article.get('published'),
-        article.get('updated'),
-        article.get('domain'),
-        None if article.get('doi') == 'AUCUN' else article.get('doi'),
-        None if article.get('comment') in ('AUCUN', 'VIDE') else article.get('comment'),
-        None if article.get('journal_ref') in ('AUCUNE', 'AUCUN') else article.get('journal_ref'),
-        article.get('pdf_url'),
-    ))
-    conn.commit()
-    cursor.execute("SELECT id FROM articles WHERE arxiv_id = ?", (article.get('arxiv_id'),))
-    return cursor.fetchone()[0]
-
-
-def update_author_affiliations(conn):
-    print("Mise à jour des affiliations (nombre d'articles par auteur)...")
-    cursor = conn.cursor()
-    cursor.execute("SELECT id FROM authors")
-    author_ids = [row[0] for row in cursor.fetchall()]
-    total = len(author_ids)
 
-    for i, author_id in enumerate(author_ids, 1):
-        cursor.execute("""
-            SELECT COUNT(*) FROM article_authors WHERE author_id = ?
-        """, (author_id,))
-        count = cursor.fetchone()[0]
-        cursor.execute("""
-            UPDATE authors SET affiliation = ? WHERE id = ?
-        """, (str(count), author_id))
+def get_ids(cursor, table, names, cache):
+    """Complète le cache nom -> id en n'insérant que les noms encore inconnus"""
+    missing = [name for name in dict.fromkeys(names) if name not in cache]
+    if missing:
+        # AUTOINCREMENT : les nouvelles lignes ont toutes un id supérieur à l'ancien maximum
+        last_id = cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+        # INSERT multi-lignes par lots : une instruction pour INSERT_BATCH noms
+        for i in range(0, len(missing), INSERT_BATCH):
+            batch = missing[i:i + INSERT_BATCH]
+            cursor.execute(f"INSERT INTO {table} (name) VALUES " + ",".join(["(?)"] * len(batch)), batch)
+        cache.update(cursor.execute(f"SELECT name, id FROM {table} WHERE id > ?", (last_id,)).fetchall())
+    return cache
+
+
+def _split_names(df, column):
+    """Éclate une colonne 'a; b; c' en une ligne par nom (arxiv_id, nom, position), sans noms vides"""
+    # Cast explicite : une colonne vide sur tout un bloc est lue avec le type null d'Arrow
+    long = df[['arxiv_id']].assign(name=df[column].astype('string').str.split(';')).explode('name')
+    long['name'] = long['name'].str.strip()
+    long = long[long['name'].notna() & (long['name'] != '')]
+    long['position'] = long.groupby(level=0).cumcount()
+    return long
+
+
+def insert_authors(cursor, df, article_ids, author_cache):
+    """Insère les auteurs distincts puis les liens article-auteur (avec leur position)"""
+    authors_long = _split_names(df, 'authors')
+
+    # Auteurs distincts, dans l'ordre de première apparition
+    author_ids = get_ids(cursor, 'authors', authors_long['name'], author_cache)
+
+    cursor.executemany("""
+    INSERT OR IGNORE INTO article_authors (article_id, author_id, position)
+    VALUES (?, ?, ?)
+    """, zip(authors_long['arxiv_id'].map(article_ids).tolist(),
+             authors_long['name'].map(author_ids).tolist(),
+             authors_long['position'].tolist()))
 
-        # Afficher la progression toutes les 100 itérations
-        if i % 100 == 0 or i == total:
-            print(f"  {i}/{total} auteurs mis à jour...")
 
-    conn.commit()
+def insert_categories(cursor, df, article_ids, category_cache):
+    """Insère les catégories distinctes puis les liens article-catégorie"""
+    categories_long = _split_names(df, 'categories')
+    category_ids = get_ids(cursor, 'categories', categories_long['name'], category_cache)
+
+    cursor.executemany("""
+    INSERT OR IGNORE INTO article_categories (article_id, category_id)
+    VALUES (?, ?)
+    """, zip(categories_long['arxiv_id'].map(article_ids).tolist(),
+             categories_long['name'].map(category_ids).tolist()))
+
+
+def read_chunks(csv_path, chunksize=CHUNK_SIZE):
+    """Lit le CSV nettoyé par blocs, en ne gardant que les colonnes importées"""
+    import_columns = set(ARTICLE_COLUMNS) | {'authors', 'categories'}
+    return pd.read_csv(csv_path, chunksize=chunksize, dtype=COL_DTYPES, dtype_backend='pyarrow',
+                       usecols=lambda col: col in import_columns)
+
+
+def ingest_chunk(cursor, chunk, author_cache, category_cache):
+    """Importe un bloc du CSV : articles, puis auteurs et catégories liés"""
+    article_ids = insert_articles(cursor, chunk)
+
+    # === INSÉRER AUTEURS depuis la colonne 'authors' ===
+    if 'authors' in chunk.columns:
+        insert_authors(cursor, chunk, article_ids, author_cache)
+
+    # === INSÉRER CATÉGORIES ===
+    if 'categories' in chunk.columns:
+        insert_categories(cursor, chunk, article_ids, category_cache)
+
+
+def update_author_affiliations(cursor):
+    print("Mise à jour des affiliations (nombre d'articles par auteur)...")
+
+    # Un seul GROUP BY sur article_authors, puis une seule mise à jour de tous les auteurs
+    cursor.execute("DROP TABLE IF EXISTS temp.author_counts")
+    cursor.execute("""
+        CREATE TEMP TABLE author_counts (author_id INTEGER PRIMARY KEY, n INTEGER)
+    """)
+    cursor.execute("""
+        INSERT INTO author_counts (author_id, n)
+        SELECT author_id, COUNT(*) FROM article_authors GROUP BY author_id
+    """)
+    cursor.execute("""
+        UPDATE authors SET affiliation = COALESCE(
+            (SELECT CAST(n AS TEXT) FROM author_counts WHERE author_counts.author_id = authors.id),
+            '0'
+        )
+    """)
+    print(f"  {cursor.rowcount} auteurs mis à jour...")
+    cursor.execute("DROP TABLE temp.author_counts")
+
     print("Affiliations mises à jour.")
 
+
+def import_csv(cursor, csv_path, chunksize=CHUNK_SIZE):
+    """Importe un CSV nettoyé dans une seule transaction et retourne le nombre d'articles lus"""
+    # Tout l'import dans une seule transaction : un seul fsync au lieu d'un par ligne
+    cursor.execute("BEGIN")
+
+    # Caches nom -> id chargés une seule fois, complétés au fil des insertions
+    author_cache = load_id_cache(cursor, 'authors')
+    category_cache = load_id_cache(cursor, 'categories')
+
+    print(f"\nImport du fichier {csv_path} par blocs de {chunksize} lignes...")
+    total = 0
+    for chunk in read_chunks(csv_path, chunksize):
+        ingest_chunk(cursor, chunk, author_cache, category_cache)
+        total += len(chunk)
+        print(f"  {total} articles insérés...")
+
+    # === Mise à jour des affiliations (nombre d’occurrences) ===
+    update_author_affiliations(cursor)
+
+    # Statistiques à jour pour que le planificateur choisisse les index
+    cursor.execute("ANALYZE")
+    cursor.execute("COMMIT")
+    return total
+
+
 def main():
     print("=== Import des données nettoyées dans la base SQLite ===")
 
     files = list_csv_files()
     csv_path = choose_file(files)
 
-    print(f"\nChargement du fichier {csv_path}...")
-    df = pd.read_csv(csv_path)
-
-    conn = sqlite3.connect(DB_PATH)
-    create_tables(conn)
-
-    print(f"Insertion des {len(df)} articles dans la base...")
-
-    for idx, row in df.iterrows():
-        article_dict = row.to_dict()
-        article_id = insert_article(conn, article_dict)
-
-        # === INSÉRER AUTEURS depuis la colonne 'authors' ===
-        authors_raw = row.get('authors')
-        if pd.notna(authors_raw):
-            authors_list = [a.strip() for a in authors_raw.split(';') if a.strip()]
-            for pos, name in enumerate(authors_list):
-                author_id = get_author_id(conn, name)
-                conn.execute("""
-                INSERT OR IGNORE INTO article_authors (article_id, author_id, position)
-                VALUES (?, ?, ?)
-                """, (article_id, author_id, pos))
-                conn.commit()
-
-        # === INSÉRER CATÉGORIES ===
-        categories_raw = row.get('categories', '')
-        if pd.notna(categories_raw) and categories_raw.strip() != '':
-            categories = [c.strip() for c in categories_raw.split(';') if c.strip()]
-            for cat_name in categories:
-                cat_id = get_category_id(conn, cat_name)
-                conn.execute("""
-                INSERT OR IGNORE INTO article_categories (article_id, category_id)
-                VALUES (?, ?)
-                """, (article_id, cat_id))
-                conn.commit()
-
-        if idx % 100 == 0 and idx > 0:
-            print(f"  {idx} articles insérés...")
+    # isolation_level=None : aucune transaction implicite, BEGIN/COMMIT gérés explicitement.
+    # Un seul curseur, partagé par toutes les fonctions d'import
+    conn = sqlite3.connect(DB_PATH, isolation_level=None)
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    create_tables(cursor)
 
-    # === Mise à jour des affiliations (nombre d’occurrences) ===
-    update_author_affiliations(conn)
+    import_csv(cursor, csv_path)
 
     print("Insertion terminée.")
     conn.close()
@@ -0,0 +1,29 @@
+import pandas as pd
+
+from src.processing.data_cleaning import DataCleaner
+
+
+def process_dates(values):
+    cleaner = DataCleaner.__new__(DataCleaner)
+    df = pd.DataFrame({'published': pd.Series(values, dtype='string')})
+    return cleaner._process_dates(df)['published'].tolist()
+
+
+def test_process_dates_reformats_valid_iso_dates():
+    assert process_dates(['2024-01-02T03:04:05Z', '2023-12-31T23:59:59Z, 2024-01-01T00:00:00Z']) == [
+        '2024/01/02 03:04:05',
+        '2023/12/31 23:59:59',
+    ]
+
+
+def test_process_dates_keeps_invalid_dates_raw():
+    """Une date au bon format mais invalide n'est pas reformatée"""
+    assert process_dates(['2024-13-45T03:04:05Z', 'inconnue']) == ['2024-13-45T03:04:05Z', 'inconnue']
+
+
+def test_process_dates_pads_non_padded_dates():
+    assert process_dates(['2024-1-2T3:4:5Z']) == ['2024/01/02 03:04:05']
+
+
+def test_process_dates_missing_values():
+    assert process_dates([None, '']) == ['', '']
@@ -0,0 +1,167 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from src.processing import database
+
+COLUMNS = ['arxiv_id', 'domain', 'title', 'abstract', 'published', 'updated', 'authors',
+           'categories', 'pdf_url', 'doi', 'comment', 'journal_ref']
+
+FIRST_IMPORT = [
+    ['0001v1', 'Ai', 'Deep, "deep" learning', 'Un résumé', '2024/01/02 03:04:05', '2024/01/03 00:00:00',
+     'Alice Martin; Bob Li', 'cs.AI; cs.LG', 'http://arxiv.org/pdf/0001v1', 'AUCUN', 'VIDE', 'AUCUNE'],
+    ['0002v1', 'Ai', 'Graphes', 'Résumé\nsur deux lignes', '2024/02/01 00:00:00', '',
+     'Bob Li;  ; Carol Ngo ; Bob Li', 'cs.LG', '', '10.1000/xyz', '12 pages', 'J. Test 1 (2024)'],
+    ['0003v1', 'Math', 'Sans auteurs', 'No abstract available', '', '',
+     '', '', '', 'AUCUN', 'AUCUN', 'AUCUN'],
+    ['0001v1', 'Ai', 'Doublon', 'Autre résumé', '', '',
+     'Dan Roe', 'math.CO', '', 'AUCUN', 'AUCUN', 'AUCUNE'],
+    ['0004v1', 'Math', 'Combinatoire', 'Résumé', '2023/12/31 23:59:59', '',
+     'Carol Ngo', 'math.CO', '', 'AUCUN', 'AUCUN', 'AUCUNE'],
+]
+
+SECOND_IMPORT = [
+    ['0004v1', 'Math', 'Combinatoire (v2)', 'Résumé', '', '',
+     'Carol Ngo; Eve Sato', 'math.CO; math.PR', '', 'AUCUN', 'AUCUN', 'AUCUNE'],
+    ['0005v1', 'Physics', 'Nouveau', 'Résumé', '', '',
+     'Alice Martin; Eve Sato', 'physics.optics', '', 'AUCUN', 'AUCUN', 'AUCUNE'],
+]
+
+
+def write_csv(path, rows):
+    pd.DataFrame(rows, columns=COLUMNS).to_csv(path, index=False, encoding='utf-8')
+    return path
+
+
+def connect():
+    conn = sqlite3.connect(":memory:", isolation_level=None)
+    database.create_tables(conn.cursor())
+    return conn
+
+
+@pytest.fixture
+def cursor():
+    conn = connect()
+    yield conn.cursor()
+    conn.close()
+
+
+def reference_import(conn, csv_path):
+    """Import ligne par ligne de la version d'origine de database.py, sert de référence"""
+    def get_id(table, name):
+        row = conn.execute(f"SELECT id FROM {table} WHERE name = ?", (name,)).fetchone()
+        if row:
+            return row[0]
+        return conn.execute(f"INSERT INTO {table} (name) VALUES (?)", (name,)).lastrowid
+
+    for _, row in pd.read_csv(csv_path).iterrows():
+        article = row.to_dict()
+        conn.execute("""
+        INSERT OR IGNORE INTO articles (
+            arxiv_id, title, abstract, published, updated, domain,
+            doi, comment, journal_ref, pdf_url
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            article.get('arxiv_id'),
+            article.get('title'),
+            article.get('abstract'),
+            article.get('published'),
+            article.get('updated'),
+            article.get('domain'),
+            None if article.get('doi') == 'AUCUN' else article.get('doi'),
+            None if article.get('comment') in ('AUCUN', 'VIDE') else article.get('comment'),
+            None if article.get('journal_ref') in ('AUCUNE', 'AUCUN') else article.get('journal_ref'),
+            article.get('pdf_url'),
+        ))
+        article_id = conn.execute("SELECT id FROM articles WHERE arxiv_id = ?",
+                                  (article.get('arxiv_id'),)).fetchone()[0]
+
+        if pd.notna(row.get('authors')):
+            names = [a.strip() for a in row['authors'].split(';') if a.strip()]
+            for pos, name in enumerate(names):
+                conn.execute("INSERT OR IGNORE INTO article_authors (article_id, author_id, position) "
+                             "VALUES (?, ?, ?)", (article_id, get_id('authors', name), pos))
+
+        if pd.notna(row.get('categories')):
+            names = [c.strip() for c in row['categories'].split(';') if c.strip()]
+            for name in names:
+                conn.execute("INSERT OR IGNORE INTO article_categories (article_id, category_id) "
+                             "VALUES (?, ?)", (article_id, get_id('categories', name)))
+
+    for (author_id,) in conn.execute("SELECT id FROM authors").fetchall():
+        count = conn.execute("SELECT COUNT(*) FROM article_authors WHERE author_id = ?",
+                             (author_id,)).fetchone()[0]
+        conn.execute("UPDATE authors SET affiliation = ? WHERE id = ?", (str(count), author_id))
+
+
+def dump(conn):
+    """Contenu de la base indexé par clés naturelles, indépendamment des id attribués"""
+    queries = {
+        'articles': "SELECT arxiv_id, title, abstract, published, updated, domain, "
+                    "doi, comment, journal_ref, pdf_url FROM articles",
+        'authors': "SELECT name, affiliation FROM authors",
+        'categories': "SELECT name FROM categories",
+        'article_authors': "SELECT a.arxiv_id, au.name, aa.position FROM article_authors aa "
+                           "JOIN articles a ON a.id = aa.article_id JOIN authors au ON au.id = aa.author_id",
+        'article_categories': "SELECT a.arxiv_id, c.name FROM article_categories ac "
+                              "JOIN articles a ON a.id = ac.article_id JOIN categories c ON c.id = ac.category_id",
+    }
+    return {table: sorted(conn.execute(query).fetchall(), key=repr) for table, query in queries.items()}
+
+
+def count(cursor, table):
+    return cursor.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+@pytest.mark.parametrize("chunksize", [1, 2, database.CHUNK_SIZE])
+def test_import_matches_row_by_row_reference(cursor, tmp_path, chunksize):
+    csv_path = write_csv(tmp_path / "articles.csv", FIRST_IMPORT)
+
+    assert database.import_csv(cursor, csv_path, chunksize) == len(FIRST_IMPORT)
+
+    expected = connect()
+    reference_import(expected, csv_path)
+    assert dump(cursor.connection) == dump(expected)
+
+    # Le doublon 0001v1 ne remplace pas l'article mais ajoute ses liens, comme la version d'origine
+    assert ('0001v1', 'Dan Roe', 0) in dump(cursor.connection)['article_authors']
+
+
+def test_reimport_into_non_empty_database(cursor, tmp_path):
+    """Un second fichier s'ajoute à une base existante sans doublons ni liens erronés"""
+    first = write_csv(tmp_path / "first.csv", FIRST_IMPORT)
+    second = write_csv(tmp_path / "second.csv", SECOND_IMPORT)
+
+    database.import_csv(cursor, first, chunksize=2)
+    database.import_csv(cursor, second, chunksize=2)
+
+    expected = connect()
+    reference_import(expected, first)
+    reference_import(expected, second)
+    assert dump(cursor.connection) == dump(expected)
+
+    # Même fichier réimporté : rien ne change
+    before = dump(cursor.connection)
+    database.import_csv(cursor, second)
+    assert dump(cursor.connection) == before
+
+
+@pytest.mark.parametrize("column", ["authors", "categories"])
+def test_chunk_with_empty_name_column(cursor, tmp_path, column):
+    """Un bloc dont toute la colonne authors ou categories est vide (type null d'Arrow) s'importe"""
+    rows = [row[:] for row in FIRST_IMPORT[:3]]
+    for row in rows:
+        row[COLUMNS.index(column)] = ''
+    csv_path = write_csv(tmp_path / "articles.csv", rows)
+
+    # Dernier bloc d'une seule ligne, cas fréquent avec l'import par blocs
+    database.import_csv(cursor, csv_path, chunksize=2)
+
+    assert count(cursor, 'articles') == 3
+    if column == 'authors':
+        assert count(cursor, 'article_authors') == 0
+        assert count(cursor, 'article_categories') == 3
+    else:
+        assert count(cursor, 'article_categories') == 0
+        assert count(cursor, 'article_authors') == 4
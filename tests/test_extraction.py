@@ -0,0 +1,105 @@
+import pytest
+
+from src.extraction.arxiv_api import ArXivExtractor
+
+FEED = b"""<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom" xmlns:arxiv="http://arxiv.org/schemas/atom">
+  <title>ArXiv Query</title>
+  <entry>
+    <id>http://arxiv.org/abs/2401.00001v2</id>
+    <updated>2024-01-03T00:00:00Z</updated>
+    <published>2024-01-02T03:04:05Z</published>
+    <title>Apprentissage
+      profond</title>
+    <summary>  Un r\xc3\xa9sum\xc3\xa9
+sur deux lignes.  </summary>
+    <author><name>Alice Martin</name><affiliation>INRIA</affiliation></author>
+    <author><name>Bob Li</name></author>
+    <arxiv:doi>10.1000/xyz</arxiv:doi>
+    <arxiv:comment>12 pages</arxiv:comment>
+    <arxiv:journal_ref>J. Test 1 (2024)</arxiv:journal_ref>
+    <link href="http://arxiv.org/abs/2401.00001v2" rel="alternate" type="text/html"/>
+    <link title="pdf" href="http://arxiv.org/pdf/2401.00001v2" rel="related" type="application/pdf"/>
+    <arxiv:primary_category term="cs.AI" scheme="http://arxiv.org/schemas/atom"/>
+    <category term="cs.AI" scheme="http://arxiv.org/schemas/atom"/>
+    <category term="cs.LG" scheme="http://arxiv.org/schemas/atom"/>
+  </entry>
+  <entry>
+    <id>http://arxiv.org/abs/math/0501001v1</id>
+    <published>2005-01-01T00:00:00Z</published>
+    <title>Sans option</title>
+    <author><name>Carol Ngo</name></author>
+    <category term="math.CO"/>
+  </entry>
+</feed>
+"""
+
+
+@pytest.fixture
+def extractor(tmp_path, monkeypatch):
+    # Le cache HTTP est créé relativement au répertoire courant
+    monkeypatch.chdir(tmp_path)
+    return ArXivExtractor()
+
+
+@pytest.mark.parametrize("chunk_size", [7, 64, len(FEED)])
+def test_parse_stream(extractor, chunk_size):
+    chunks = (FEED[i:i + chunk_size] for i in range(0, len(FEED), chunk_size))
+
+    articles = list(extractor._parse_stream(chunks, 'all:test'))
+
+    assert articles == [
+        {
+            'arxiv_id': '2401.00001v2',
+            'published': '2024-01-02T03:04:05Z',
+            'updated': '2024-01-03T00:00:00Z',
+            'title': 'Apprentissage       profond',
+            'summary': 'Un résumé sur deux lignes.',
+            'authors': [{'name': 'Alice Martin', 'affiliation': 'INRIA'},
+                        {'name': 'Bob Li', 'affiliation': None}],
+            'primary_category': 'cs.AI',
+            'categories': ['cs.AI', 'cs.LG'],
+            'pdf_url': 'http://arxiv.org/pdf/2401.00001v2',
+            'doi': '10.1000/xyz',
+            'comment': '12 pages',
+            'journal_ref': 'J. Test 1 (2024)',
+            'search_query': 'all:test',
+        },
+        {
+            'arxiv_id': '0501001v1',
+            'published': '2005-01-01T00:00:00Z',
+            'updated': None,
+            'title': 'Sans option',
+            'summary': '',
+            'authors': [{'name': 'Carol Ngo', 'affiliation': None}],
+            'primary_category': None,
+            'categories': ['math.CO'],
+            'pdf_url': None,
+            'doi': None,
+            'comment': None,
+            'journal_ref': None,
+            'search_query': 'all:test',
+        },
+    ]
+
+
+def test_get_all_metadata_stops_after_short_page(extractor, monkeypatch):
+    """Pages renvoyées dans l'ordre, arrêt au premier lot incomplet"""
+    extractor.max_batch_size = 10
+    total = 25
+    requested = []
+
+    def fake_fetch(params, search_query):
+        requested.append(params['start'])
+        end = min(params['start'] + params['max_results'], total)
+        return [{'arxiv_id': str(i)} for i in range(params['start'], end)]
+
+    monkeypatch.setattr(extractor, '_fetch_batch', fake_fetch)
+    monkeypatch.setattr(extractor, '_is_fresh', lambda params: True)
+
+    batches = list(extractor.get_all_metadata('all:test', max_results=100))
+
+    assert [len(batch) for batch in batches] == [10, 10, 5]
+    assert [a['arxiv_id'] for batch in batches for a in batch] == [str(i) for i in range(total)]
+    assert requested == sorted(requested)
+    assert len(requested) <= 3 + extractor.max_workers